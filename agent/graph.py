@@ -3,17 +3,18 @@ Builds and compiles the LangGraph DAG.
 
 Full topology:
 
-  classify_question
+  START ──┬─ classify_question ─┐   (parallel: both are independent LLM
+          └─ generate_sql ──────┤    calls on the raw question)
+                                │
+                           join_intent  ← waits for both
+                                │
+      ├─ chitchat → handle_chitchat → END   (speculative SQL discarded)
       │
-      ├─ chitchat → handle_chitchat → END
-      │
-      └─ data → generate_sql ←────────────────────────┐
-                     │                                 │  retry (transient/max not hit)
-                 confirm_sql  ← HITL gate             │
-                 (interrupt() pauses here for          │
-                  DDL or when hitl_sql_preview=True)   │
-                     │                                 │
-                 execute_sql ────────────────────────→─┘
+      └─ data → confirm_sql  ← HITL gate ←── retry_sql ←──┐
+                (interrupt() pauses here for               │  retry (transient/max not hit)
+                 DDL or when hitl_sql_preview=True)         │
+                     │                                     │
+                 execute_sql ──────────────────────────→───┘
                      │
                      ├─ sql_error, max retries  → state_printer → END
                      ├─ tag=table               → state_printer → END
@@ -23,6 +24,13 @@ Full topology:
                                           │
                                      state_printer → END
 
+Parallel fan-out:
+  Classification and the first SQL draft overlap, so a data question pays
+  one LLM round-trip before the HITL gate instead of two. Chitchat questions
+  waste one SQL-generation call; that is the trade-off. Retries run the same
+  generate_sql function as a separate node (retry_sql) — routing back into
+  the fan-in would wait on a classify_question that never re-runs.
+
 Human-in-the-loop (HITL):
   The graph is compiled with a MemorySaver checkpointer so its state can be
   persisted across the HTTP boundary.
@@ -43,13 +51,14 @@ Error retry loop:
 from __future__ import annotations
 
 import logging
+from collections import OrderedDict
 from pathlib import Path
 
-from langchain_classic.chains.sql_database.query import create_sql_query_chain
-from langchain_community.utilities import SQLDatabase
+from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
+from openai import DefaultAsyncHttpxClient
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import END, StateGraph
+from langgraph.graph import END, START, StateGraph
 
 from agent.nodes import (
     classify_question,
@@ -59,6 +68,7 @@ from agent.nodes import (
     generate_chart_instructions,
     generate_sql,
     handle_chitchat,
+    join_intent,
     route_after_sql,
     route_by_intent,
     state_printer,
@@ -76,6 +86,53 @@ _INSTRUCTIONS_PATH = Path(__file__).parent / "instructions.md"
 # For production swap with AsyncPostgresSaver or AsyncSqliteSaver.
 _checkpointer = MemorySaver()
 
+# One async HTTP pool for every ChatOpenAI in the process. Nodes already await
+# ainvoke(); sharing the pool means those calls reuse warm TLS connections
+# instead of each model (×4 per DAG, ×N sessions) keeping its own.
+# Opened on first use and closed at API shutdown; a later lifespan in the
+# same process (TestClient, reload) opens a fresh one.
+_http_async_client: DefaultAsyncHttpxClient | None = None
+
+
+def _http_client() -> DefaultAsyncHttpxClient:
+    global _http_async_client
+    if _http_async_client is None or _http_async_client.is_closed:
+        _http_async_client = DefaultAsyncHttpxClient()
+    return _http_async_client
+
+
+def _chat_model(model: str, **kwargs) -> ChatOpenAI:
+    return ChatOpenAI(
+        model=model,
+        api_key=settings.openai_api_key,
+        http_async_client=_http_client(),
+        **kwargs,
+    )
+
+
+async def aclose_http_client() -> None:
+    """
+    Close the shared LLM connection pool — call once at shutdown.
+    Cached DAGs hold models bound to it, so they are dropped as well.
+    """
+    global _http_async_client
+    client, _http_async_client = _http_async_client, None
+    _dag_cache.clear()
+    if client is not None:
+        await client.aclose()
+
+
+# Compiled DAGs keyed on (db_uri, db_type, tables). Reconnecting to a database
+# whose table set is unchanged skips graph compilation. Schema reflection is
+# not part of building a DAG at all: the prompt's schema text is cached per
+# database in nodes.table_info, rendered by the first generate_sql and dropped
+# only after DDL or when the last session disconnects — so a reconnect, hit
+# or miss here, does not re-reflect, and a cached DAG never holds stale text.
+# Safe to share between sessions: per-run state lives in the checkpointer
+# under each query's own thread_id.
+_DAG_CACHE_SIZE = 32
+_dag_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
 
 def _load_instructions(db_type: str, tables: list[str]) -> str:
     try:
@@ -91,12 +148,13 @@ def _load_instructions(db_type: str, tables: list[str]) -> str:
 
 def build_graph(sql_generator) -> object:
     def _llm(model: str, max_tokens: int) -> ChatOpenAI:
-        return ChatOpenAI(model=model, api_key=settings.openai_api_key, max_tokens=max_tokens)
+        return _chat_model(model, max_tokens=max_tokens)
 
     # Each node gets its own model — tune MODEL_CLASSIFY / MODEL_SQL / etc in env vars.
     llm_classify = _llm(settings.model_classify, 32)    # only outputs "INTENT: x\nTAG: y"
     llm_chitchat = _llm(settings.model_chitchat, 256)   # short user-facing replies
-    llm_chart    = _llm(settings.model_chart, 1024)     # plotly code needs more room
+    # JSON mode: the chart node returns a small spec, never code
+    llm_chart    = _llm(settings.model_chart, 128).bind(response_format={"type": "json_object"})
 
     workflow = StateGraph(GraphState)
 
@@ -117,32 +175,36 @@ def build_graph(sql_generator) -> object:
     workflow.add_node("classify_question",           _classify_question)
     workflow.add_node("handle_chitchat",             _handle_chitchat)
     workflow.add_node("generate_sql",                _generate_sql)
+    workflow.add_node("join_intent",                 join_intent)
+    workflow.add_node("retry_sql",                   _generate_sql)
     workflow.add_node("confirm_sql",                 confirm_sql)       # sync — interrupt() is sync
     workflow.add_node("execute_sql",                 execute_sql)
     workflow.add_node("generate_chart_instructions", _generate_chart_instructions)
     workflow.add_node("execute_chart_code",          execute_chart_code)
     workflow.add_node("state_printer",               state_printer)
 
-    # ── Entry ────────────────────────────────────────────────────────────────
-    workflow.set_entry_point("classify_question")
+    # ── Entry — fan out, then fan in ─────────────────────────────────────────
+    workflow.add_edge(START, "classify_question")
+    workflow.add_edge(START, "generate_sql")
+    workflow.add_edge(["classify_question", "generate_sql"], "join_intent")
 
     # ── Intent branch ────────────────────────────────────────────────────────
     workflow.add_conditional_edges(
-        "classify_question",
+        "join_intent",
         route_by_intent,
-        {"handle_chitchat": "handle_chitchat", "generate_sql": "generate_sql"},
+        {"handle_chitchat": "handle_chitchat", "confirm_sql": "confirm_sql"},
     )
     workflow.add_edge("handle_chitchat", END)
 
     # ── SQL pipeline ─────────────────────────────────────────────────────────
-    workflow.add_edge("generate_sql", "confirm_sql")    # always goes through HITL gate
-    workflow.add_edge("confirm_sql",  "execute_sql")    # gate either passes or sets sql_query=""
+    workflow.add_edge("retry_sql",   "confirm_sql")     # always goes through HITL gate
+    workflow.add_edge("confirm_sql", "execute_sql")     # gate either passes or sets sql_query=""
 
     workflow.add_conditional_edges(
         "execute_sql",
         route_after_sql,
         {
-            "generate_sql":               "generate_sql",
+            "generate_sql":               "retry_sql",
             "state_printer":              "state_printer",
             "generate_chart_instructions": "generate_chart_instructions",
         },
@@ -163,18 +225,38 @@ def initialize_dag(db_uri: str, db_type: str = "", tables: list[str] | None = No
     Called once at /connect; stored in the user's Session.
     """
     tables = tables or []
+    key = (db_uri, db_type, tuple(tables))
+    cached = _dag_cache.get(key)
+    if cached is not None:
+        _dag_cache.move_to_end(key)
+        logger.info("Reusing DAG  db_type=%s  tables=%d", db_type, len(tables))
+        return cached
+
     logger.info(
         "Initialising DAG  db_type=%s  tables=%d  uri=%.30s…",
         db_type, len(tables), db_uri,
     )
-    db = SQLDatabase.from_uri(db_uri)
+    # Schema DDL + sample rows are NOT baked in: generate_sql passes them as
+    # the table_info input, from nodes.table_info() — rendered once per
+    # database, off the event loop, and re-rendered after DDL. A cached DAG
+    # therefore never holds a stale schema.
+    prompt = get_sql_generation_prompt(db_type).partial(top_k=str(settings.sql_result_limit))
     # SQL node gets the strongest model + dialect-specific prompt.
-    llm_for_sql = ChatOpenAI(model=settings.model_sql, api_key=settings.openai_api_key)
-    sql_generator = create_sql_query_chain(
-        llm=llm_for_sql, db=db,
-        k=settings.sql_result_limit,
-        prompt=get_sql_generation_prompt(db_type),
+    llm_for_sql = _chat_model(settings.model_sql)
+    sql_generator = (
+        {
+            "input": lambda x: x["question"] + "\nSQLQuery: ",
+            "table_info": lambda x: x["table_info"],
+        }
+        | prompt
+        | llm_for_sql.bind(stop=["\nSQLResult:"])
+        | StrOutputParser()
+        | str.strip
     )
     instructions = _load_instructions(db_type, tables)
     dag = build_graph(sql_generator)
+
+    _dag_cache[key] = (dag, instructions)
+    if len(_dag_cache) > _DAG_CACHE_SIZE:
+        _dag_cache.popitem(last=False)
     return dag, instructions
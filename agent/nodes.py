@@ -8,7 +8,7 @@ Node contract:
 Async strategy:
   - LLM calls   → await llm.ainvoke()      (true async I/O)
   - SQL queries  → asyncio.to_thread()     (sync SQLAlchemy in thread pool)
-  - Chart render → asyncio.to_thread()     (exec() is sync, run in thread pool)
+  - Chart render → asyncio.to_thread()     (Plotly figure + HTML is CPU-bound)
 
 Error handling strategy:
   - Every node catches its own exceptions and puts them in state
@@ -18,17 +18,23 @@ Error handling strategy:
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
 import logging
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Hashable, Optional
 
-import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.io as pio
 import sqlalchemy.exc as sa_exc
+from langchain_community.utilities import SQLDatabase
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.types import interrupt
-from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
 
 from agent.prompts import (
     CHART_GENERATION_TEMPLATE,
@@ -45,11 +51,48 @@ _CHART_COLORS = [
     "#F59E0B", "#FB923C", "#10B981", "#60A5FA",
     "#F87171", "#A78BFA", "#FBBF24", "#34D399",
 ]
-_CHART_THEME = "plotly_dark"
+
+# Dark-glass styling, registered once as a Plotly template at import so the
+# builders get it for free instead of re-validating a layout on every render.
+_CHART_THEME = "bi_dark"
+
+
+def _register_chart_theme() -> None:
+    tpl = go.layout.Template(pio.templates["plotly_dark"])
+    axis = dict(
+        gridcolor="rgba(255,255,255,0.06)",
+        linecolor="rgba(255,255,255,0.08)",
+        tickfont=dict(size=11, color="rgba(255,255,255,0.50)"),
+        title_font=dict(size=12, color="rgba(255,255,255,0.60)"),
+    )
+    tpl.layout.update(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        colorway=_CHART_COLORS,
+        font=dict(color="rgba(255,255,255,0.72)", family="Inter, system-ui, sans-serif"),
+        margin=dict(l=48, r=24, t=52, b=44),
+        legend=dict(
+            bgcolor="rgba(0,0,0,0)",
+            borderwidth=0,
+            font=dict(size=11, color="rgba(255,255,255,0.60)"),
+        ),
+        xaxis=axis,
+        yaxis=axis,
+        title_font=dict(size=14, color="rgba(255,255,255,0.80)"),
+    )
+    # Thicken lines and enlarge markers so they read well on dark glass
+    for trace in tpl.data.scatter:
+        trace.update(line=dict(width=2.5), marker=dict(size=7))
+    for trace in tpl.data.bar:
+        trace.update(marker_line_width=0, opacity=0.92)
+    pio.templates[_CHART_THEME] = tpl
+
+
+_register_chart_theme()
 
 from core.config import settings
+from core.database import get_engine
 from core.utils import (
-    extract_python_code,
     extract_sql_code,
     extract_table_name_from_sql,
     is_multi_statement_sql,
@@ -128,10 +171,74 @@ def _system_msg(state: GraphState) -> SystemMessage:
     return SystemMessage(content=state.get("system_instructions", "You are a BI assistant."))
 
 
+# ── Question cache ────────────────────────────────────────────────────────────
+# BI users re-ask the same questions constantly. Both classify_question and the
+# first generate_sql pass depend only on the question text (plus the database,
+# for SQL), so a repeat can skip the LLM round-trip entirely.
+# SQL is cached only after it executed successfully — a bad draft never sticks.
+
+_classify_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_sql_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+
+def _question_key(question: str) -> str:
+    """Case/whitespace/trailing-punctuation-insensitive form of a question."""
+    return " ".join(question.lower().split()).rstrip("?.! ")
+
+
+def _cache_get(cache: OrderedDict, key: Hashable) -> Optional[object]:
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: OrderedDict, key: Hashable, value: object, maxsize: Optional[int] = None) -> None:
+    maxsize = settings.question_cache_size if maxsize is None else maxsize
+    if maxsize <= 0:
+        return
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > maxsize:
+        cache.popitem(last=False)
+
+
+# ── Schema prompt cache ───────────────────────────────────────────────────────
+# generate_sql's prompt embeds the schema DDL + sample rows. Rendering it costs
+# reflection plus a sample-rows SELECT per table, so it is rendered once per
+# database and reused — until execute_sql runs DDL there or the last session
+# disconnects, either of which drops the entry.
+
+_TABLE_INFO_CACHE_SIZE = 32
+_table_info_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def table_info(db_uri: str) -> str:
+    """
+    Schema text for the SQL prompt, reflected on first use per database.
+    Blocking — async callers go through asyncio.to_thread().
+    """
+    info = _cache_get(_table_info_cache, db_uri)
+    if info is None:
+        info = SQLDatabase(get_engine(db_uri)).get_table_info()
+        _cache_put(_table_info_cache, db_uri, info, _TABLE_INFO_CACHE_SIZE)
+    return info
+
+
+def invalidate_table_info(db_uri: str) -> None:
+    _table_info_cache.pop(db_uri, None)
+
+
 # ── Node 1 — classify intent + visualisation type ────────────────────────────
 
 async def classify_question(state: GraphState, llm) -> dict:
     """Single LLM call → intent (data|chitchat) + tag (chart|table)."""
+    key = _question_key(state["question"])
+    cached = _cache_get(_classify_cache, key)
+    if cached is not None:
+        logger.debug("classify: cache hit intent=%s tag=%s", *cached)
+        return {"intent": cached[0], "tag": cached[1]}
+
     prompt = CLASSIFY_TEMPLATE.format(question=state["question"])
     try:
         # No DB schema or persona needed — just a compact classifier system prompt.
@@ -146,8 +253,6 @@ async def classify_question(state: GraphState, llm) -> dict:
         # Default to data/table so the pipeline still attempts a query
         return {
             "intent": "data", "tag": "table",
-            "sql_retry_count": 0, "sql_error": None,
-            "is_ddl": False, "hitl_approved": None,
             "error_node": "classify_question", "error_category": category,
         }
 
@@ -165,12 +270,10 @@ async def classify_question(state: GraphState, llm) -> dict:
                 tag = v
 
     logger.debug("classify: intent=%s tag=%s", intent, tag)
-    return {
-        "intent": intent, "tag": tag,
-        "sql_retry_count": 0, "sql_error": None,
-        "is_ddl": False, "hitl_approved": None,
-        "error_node": None, "error_category": None,
-    }
+    _cache_put(_classify_cache, key, (intent, tag))
+    # Only intent/tag: generate_sql runs alongside this node and owns the SQL
+    # fields; the per-turn resets are already in the service's blank inputs.
+    return {"intent": intent, "tag": tag}
 
 
 # ── Node 2 — handle chitchat ──────────────────────────────────────────────────
@@ -188,13 +291,23 @@ async def handle_chitchat(state: GraphState, llm) -> dict:
         logger.error("handle_chitchat LLM error: %s", exc)
         reply = "I'm having trouble responding right now. Please try again."
     logger.debug("chitchat reply: %.60s", reply)
-    return {"direct_response": reply, "final_output": {"message": reply}}
+    # Drop the speculative SQL drafted in parallel with classification
+    return {
+        "direct_response": reply, "final_output": {"message": reply},
+        "sql_query": "", "sql_error": None, "is_ddl": False,
+    }
 
 
 # ── SQL retry hint extractor ──────────────────────────────────────────────────
 
 import re as _re
 
+# Compiled once at import — _error_hint runs on every failed attempt.
+_QUALIFIED_COLUMN_RE = _re.compile(r"no such column[:\s]+([`'\"]?)(\w+)\.(\w+)\1", _re.IGNORECASE)
+_MISSING_COLUMN_RE = _re.compile(r"no such column[:\s]+([`'\"]?)(\w+)\1", _re.IGNORECASE)
+_MISSING_TABLE_RE = _re.compile(r"no such table[:\s]+([`'\"]?)(\w+)\1", _re.IGNORECASE)
+_AMBIGUOUS_RE = _re.compile(r"ambiguous[^:]*[:\s]+([`'\"]?)(\w+)\1", _re.IGNORECASE)
+
 def _error_hint(error_msg: str) -> str:
     """
     Parse a SQL error string and return a targeted natural-language hint
@@ -203,7 +316,7 @@ def _error_hint(error_msg: str) -> str:
     msg = error_msg.lower()
 
     # "no such column: alias.Column" — alias/column mismatch
-    m = _re.search(r"no such column[:\s]+([`'\"]?)(\w+)\.(\w+)\1", error_msg, _re.IGNORECASE)
+    m = _QUALIFIED_COLUMN_RE.search(error_msg)
     if m:
         alias, col = m.group(2), m.group(3)
         return (
@@ -213,7 +326,7 @@ def _error_hint(error_msg: str) -> str:
         )
 
     # "no such column: Column" — column doesn't exist at all
-    m = _re.search(r"no such column[:\s]+([`'\"]?)(\w+)\1", error_msg, _re.IGNORECASE)
+    m = _MISSING_COLUMN_RE.search(error_msg)
     if m:
         col = m.group(2)
         return (
@@ -222,7 +335,7 @@ def _error_hint(error_msg: str) -> str:
         )
 
     # "no such table"
-    m = _re.search(r"no such table[:\s]+([`'\"]?)(\w+)\1", error_msg, _re.IGNORECASE)
+    m = _MISSING_TABLE_RE.search(error_msg)
     if m:
         tbl = m.group(2)
         return (
@@ -232,7 +345,7 @@ def _error_hint(error_msg: str) -> str:
 
     # ambiguous column name
     if "ambiguous" in msg:
-        m = _re.search(r"ambiguous[^:]*[:\s]+([`'\"]?)(\w+)\1", error_msg, _re.IGNORECASE)
+        m = _AMBIGUOUS_RE.search(error_msg)
         col = m.group(2) if m else "a column"
         return (
             f"Hint: '{col}' is ambiguous — it exists in more than one joined table. "
@@ -257,6 +370,12 @@ async def generate_sql(state: GraphState, sql_generator) -> dict:
     sql_error = state.get("sql_error")
 
     question = state["question"]
+    if retry_count == 0:
+        cached = _cache_get(_sql_cache, (state["db_uri"], _question_key(question)))
+        if cached is not None:
+            logger.debug("generate_sql: cache hit sql=%.120s", cached)
+            return {"sql_query": cached, "is_ddl": _is_ddl(cached)}
+
     if retry_count > 0 and sql_error:
         hint = _error_hint(sql_error)
         question = (
@@ -268,7 +387,9 @@ async def generate_sql(state: GraphState, sql_generator) -> dict:
         )
 
     try:
-        raw = await sql_generator.ainvoke({"question": question})
+        # Reflection runs off the event loop on a cache miss (first query, after DDL)
+        schema = await asyncio.to_thread(table_info, state["db_uri"])
+        raw = await sql_generator.ainvoke({"question": question, "table_info": schema})
     except Exception as exc:
         category = classify_sql_error(exc)
         logger.error(
@@ -294,6 +415,13 @@ async def generate_sql(state: GraphState, sql_generator) -> dict:
     return {"sql_query": sql_query, "is_ddl": is_ddl}
 
 
+# ── Fan-in — classification and first SQL draft both done ────────────────────
+
+def join_intent(state: GraphState) -> dict:
+    """Fan-in point for classify_question + generate_sql; routing happens on its out-edge."""
+    return {}
+
+
 # ── Node 4 — human-in-the-loop gate ──────────────────────────────────────────
 
 def confirm_sql(state: GraphState) -> dict:
@@ -351,29 +479,79 @@ def confirm_sql(state: GraphState) -> dict:
 
 # ── Node 5 — execute SQL ──────────────────────────────────────────────────────
 
-def _run_sql_sync(sql_query: str, db_uri: str) -> dict:
-    engine = create_engine(db_uri)
-    with engine.connect() as conn:
-        if is_multi_statement_sql(sql_query):
-            tables = []
-            for i, stmt in enumerate(split_sql_statements(sql_query)):
-                try:
-                    df = pd.read_sql(stmt, conn)
-                    tables.append({
-                        "table_name": extract_table_name_from_sql(stmt),
-                        "dataframe": {col: df[col].tolist() for col in df.columns},
-                        "sql_statement": stmt,
-                    })
-                except Exception as exc:
-                    tables.append({
-                        "table_name": f"Error in statement {i + 1}",
-                        "error": str(exc),
-                        "sql_statement": stmt,
-                    })
-            return {"multi_table": True, "tables": tables}
-        else:
-            df = pd.read_sql(sql_query, conn)
-            return {col: df[col].tolist() for col in df.columns}
+_MAX_STATEMENT_WORKERS = 8   # parallel reads per multi-statement query
+
+
+def _read_capped(stmt: str, conn) -> tuple[pd.DataFrame, bool]:
+    """
+    Run *stmt* and keep at most settings.sql_result_limit rows.
+    Returns (frame, truncated) — truncated is True when more rows existed.
+    Works for every dialect (no LIMIT/TOP/FETCH rewriting): one extra row is
+    fetched to detect the overflow, then the result is closed. With a
+    server-side cursor (psycopg2, DuckDB) the remaining rows are never sent;
+    pymysql's streaming cursor still drains them on close, but they are
+    discarded rather than held in memory.
+    """
+    limit = settings.sql_result_limit
+    # Server-side cursors are for reads only: psycopg2 would wrap a write in
+    # DECLARE … CURSOR FOR, which Postgres rejects. Passed per statement —
+    # Connection.execution_options() would stick to the shared connection
+    # of a sequential batch.
+    opts = {} if _is_ddl(stmt) else {"stream_results": True}
+    # exec_driver_sql like pd.read_sql: raw SQL, no bind-param parsing of ':'
+    result = conn.exec_driver_sql(stmt, execution_options=opts)
+    try:
+        columns = list(result.keys())
+        rows = result.fetchmany(limit + 1)
+    finally:
+        result.close()
+    df = pd.DataFrame.from_records(rows[:limit], columns=columns, coerce_float=True)
+    return df, len(rows) > limit
+
+
+def _statement_result(i: int, stmt: str, conn) -> dict:
+    try:
+        df, truncated = _read_capped(stmt, conn)
+        return {
+            "table_name": extract_table_name_from_sql(stmt),
+            "dataframe": df.to_dict(orient="list"),
+            "sql_statement": stmt,
+            "truncated": truncated,
+        }
+    except Exception as exc:
+        return {
+            "table_name": f"Error in statement {i + 1}",
+            "error": str(exc),
+            "sql_statement": stmt,
+        }
+
+
+def _run_sql_sync(sql_query: str, db_uri: str) -> tuple[dict, bool]:
+    """Returns (data, truncated); multi-table results flag truncation per table."""
+    engine = get_engine(db_uri)
+    if not is_multi_statement_sql(sql_query):
+        with engine.connect() as conn:
+            df, truncated = _read_capped(sql_query, conn)
+        return df.to_dict(orient="list"), truncated
+
+    statements = split_sql_statements(sql_query)
+    if any(_is_ddl(s) for s in statements) or isinstance(engine.pool, StaticPool):
+        # Writes must apply in order on one connection; a single-connection
+        # pool can't serve concurrent readers either.
+        with engine.connect() as conn:
+            tables = [_statement_result(i, s, conn) for i, s in enumerate(statements)]
+        return {"multi_table": True, "tables": tables}, False
+
+    # Read-only batch: one pooled connection per statement (Connections are
+    # not thread-safe), so N round-trips overlap instead of queueing.
+    def _read(i: int, stmt: str) -> dict:
+        with engine.connect() as conn:
+            return _statement_result(i, stmt, conn)
+
+    workers = min(_MAX_STATEMENT_WORKERS, len(statements))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        tables = list(pool.map(_read, range(len(statements)), statements))
+    return {"multi_table": True, "tables": tables}, False
 
 
 async def execute_sql(state: GraphState) -> dict:
@@ -393,14 +571,26 @@ async def execute_sql(state: GraphState) -> dict:
         }
 
     retry_count = state.get("sql_retry_count", 0)
+    writes = state.get("is_ddl") or (
+        is_multi_statement_sql(sql) and any(_is_ddl(s) for s in split_sql_statements(sql))
+    )
     try:
-        data = await asyncio.to_thread(_run_sql_sync, sql, state["db_uri"])
-        logger.info(
-            "execute_sql OK  rows=%s",
-            len(data.get("tables", data)) if isinstance(data.get("tables"), list) else len(data),
-            extra={"error_node": None, "error_category": None},
-        )
-        return {"data": data, "sql_error": None, "error_node": None, "error_category": None}
+        data, truncated = await asyncio.to_thread(_run_sql_sync, sql, state["db_uri"])
+        if logger.isEnabledFor(logging.INFO):
+            ok_extra = {"error_node": None, "error_category": None}
+            if data.get("multi_table"):
+                logger.info("execute_sql OK  tables=%d", len(data["tables"]), extra=ok_extra)
+            else:
+                logger.info(
+                    "execute_sql OK  rows=%d", len(next(iter(data.values()), [])),
+                    extra=ok_extra,
+                )
+        if not writes:
+            _cache_put(_sql_cache, (state["db_uri"], _question_key(state["question"])), sql)
+        return {
+            "data": data, "data_truncated": truncated,
+            "sql_error": None, "error_node": None, "error_category": None,
+        }
 
     except Exception as exc:
         category = classify_sql_error(exc)
@@ -422,12 +612,17 @@ async def execute_sql(state: GraphState) -> dict:
             "error_node": "execute_sql",
             "error_category": category,
         }
+    finally:
+        if writes:
+            # Even a failed write may have applied (autocommit DDL, earlier
+            # statements of a batch) — re-reflect before the next SQL prompt
+            invalidate_table_info(state["db_uri"])
 
 
 # ── Routing functions (not nodes) ─────────────────────────────────────────────
 
 def route_by_intent(state: GraphState) -> str:
-    return "handle_chitchat" if state.get("intent") == "chitchat" else "generate_sql"
+    return "handle_chitchat" if state.get("intent") == "chitchat" else "confirm_sql"
 
 
 def route_after_sql(state: GraphState) -> str:
@@ -454,120 +649,133 @@ def route_after_sql(state: GraphState) -> str:
     )
 
 
-# ── Node 6 — generate chart code ─────────────────────────────────────────────
+# ── Node 6 — choose chart spec ───────────────────────────────────────────────
 
 async def generate_chart_instructions(state: GraphState, llm) -> dict:
     data = state.get("data", {})
     if isinstance(data, dict) and data.get("multi_table"):
         tables = data.get("tables", [])
         if not tables or "dataframe" not in tables[0]:
-            return {"chart_script": "Error: No chartable data."}
+            return {"chart_spec": None}
         data = tables[0]["dataframe"]
 
-    df_sample = pd.DataFrame(data).head(5).to_dict(orient="records")
+    # Only the first 5 rows reach the prompt — slice before building a frame
+    df_sample = pd.DataFrame({col: vals[:5] for col, vals in data.items()}).to_dict(orient="records")
     prompt = CHART_GENERATION_TEMPLATE.format(
         question=state["question"],
         columns=list(data.keys()),
         sample=df_sample,
     )
     try:
-        # Chart node only needs Plotly expertise — no BI persona or DB schema.
+        # Chart node only needs visualisation expertise — no BI persona or DB schema.
         response = await llm.ainvoke([SystemMessage(content=CHART_SYSTEM_PROMPT), HumanMessage(content=prompt)])
-        chart_script = extract_python_code(response)
     except Exception as exc:
         logger.error(
             "generate_chart_instructions LLM error: %s", exc,
             extra={"error_node": "generate_chart_instructions"},
         )
-        chart_script = "Error: LLM unavailable for chart generation."
+        return {"chart_spec": None}
+
+    spec = _parse_chart_spec(response.content, list(data.keys()))
+    logger.debug("Chart spec: %s", spec)
+    return {"chart_spec": spec}
+
 
-    logger.debug("Chart script generated (%d chars)", len(chart_script))
-    return {"chart_script": chart_script}
+# ── Node 7 — render chart ─────────────────────────────────────────────────────
+# The LLM only chooses a spec; every figure is built by one of these functions.
+# Nothing model-generated is executed.
 
+def _chart_kwargs(spec: dict) -> dict:
+    kwargs = {"x": spec["x"], "title": spec.get("title") or None, "template": _CHART_THEME}
+    if spec.get("y"):
+        kwargs["y"] = spec["y"]
+    if spec.get("color"):
+        kwargs["color"] = spec["color"]
+        kwargs["color_discrete_sequence"] = _CHART_COLORS
+    else:
+        kwargs["color_discrete_sequence"] = [_CHART_COLORS[0]]
+    return kwargs
 
-# ── Node 7 — execute chart code ──────────────────────────────────────────────
 
-_EXEC_BUILTINS = {
-    "len": len, "range": range, "enumerate": enumerate, "zip": zip,
-    "list": list, "dict": dict, "tuple": tuple, "set": set,
-    "str": str, "int": int, "float": float, "bool": bool,
-    "round": round, "abs": abs, "min": min, "max": max, "sum": sum,
-    "sorted": sorted, "reversed": reversed, "print": print,
-    "isinstance": isinstance, "hasattr": hasattr, "getattr": getattr,
+def _bar(df: pd.DataFrame, spec: dict) -> go.Figure:
+    if spec.get("sort_desc") and spec.get("y"):
+        df = df.sort_values(spec["y"], ascending=False)
+    return px.bar(df, **_chart_kwargs(spec))
+
+
+def _pie(df: pd.DataFrame, spec: dict) -> go.Figure:
+    return px.pie(
+        df, names=spec["x"], values=spec["y"], title=spec.get("title") or None,
+        template=_CHART_THEME, color_discrete_sequence=_CHART_COLORS, hole=0.35,
+    )
+
+
+_CHART_BUILDERS = {
+    "bar":       _bar,
+    "line":      lambda df, spec: px.line(df, **_chart_kwargs(spec)),
+    "area":      lambda df, spec: px.area(df, **_chart_kwargs(spec)),
+    "scatter":   lambda df, spec: px.scatter(df, **_chart_kwargs(spec)),
+    "histogram": lambda df, spec: px.histogram(df, **_chart_kwargs(spec)),
+    "pie":       _pie,
 }
 
 
-def _render_plotly_sync(chart_script: str, data: dict) -> str:
-    df = pd.DataFrame(data)
-    local_ns: dict = {
-        "__builtins__": _EXEC_BUILTINS,
-        "df": df,
-        # Common LLM aliases for the dataframe — all point to the same object
-        "df_filtered": df, "df_plot": df, "df_chart": df, "data": df,
-        "px": px, "go": go, "pd": pd, "np": np,
-        "COLORS": _CHART_COLORS, "THEME": _CHART_THEME,
-    }
+def _parse_chart_spec(raw: str, columns: list) -> Optional[dict]:
+    """Parse and validate the LLM's JSON spec against the real columns; None if unusable."""
     try:
-        exec(chart_script, local_ns)  # noqa: S102
-    except Exception as exc:
-        logger.error("Chart exec error: %s\nScript:\n%s", exc, chart_script)
-        raise
+        spec = json.loads(raw)
+    except (TypeError, ValueError):
+        logger.warning("Chart spec is not valid JSON: %.200s", raw)
+        return None
+    if not isinstance(spec, dict):
+        return None
+
+    chart_type = str(spec.get("chart_type", "")).lower()
+    x, y, color = spec.get("x"), spec.get("y"), spec.get("color")
+    if chart_type not in _CHART_BUILDERS or x not in columns:
+        logger.warning("Chart spec rejected (type=%r x=%r)", chart_type, x)
+        return None
+    if y not in columns:
+        if chart_type != "histogram":
+            logger.warning("Chart spec rejected (type=%r y=%r)", chart_type, y)
+            return None
+        y = None
+    return {
+        "chart_type": chart_type,
+        "x": x,
+        "y": y,
+        "color": color if color in columns else None,
+        "title": str(spec.get("title") or ""),
+        "sort_desc": bool(spec.get("sort_desc")),
+    }
 
-    fig: go.Figure | None = local_ns.get("fig")
-    if fig is None:
-        logger.error("Chart script produced no 'fig':\n%s", chart_script)
-        raise RuntimeError("Chart script did not assign to 'fig'")
 
-    fig.update_layout(
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        colorway=_CHART_COLORS,
-        font=dict(color="rgba(255,255,255,0.72)", family="Inter, system-ui, sans-serif"),
-        margin=dict(l=48, r=24, t=52, b=44),
-        legend=dict(
-            bgcolor="rgba(0,0,0,0)",
-            borderwidth=0,
-            font=dict(size=11, color="rgba(255,255,255,0.60)"),
-        ),
-        xaxis=dict(
-            gridcolor="rgba(255,255,255,0.06)",
-            linecolor="rgba(255,255,255,0.08)",
-            tickfont=dict(size=11, color="rgba(255,255,255,0.50)"),
-            title_font=dict(size=12, color="rgba(255,255,255,0.60)"),
-        ),
-        yaxis=dict(
-            gridcolor="rgba(255,255,255,0.06)",
-            linecolor="rgba(255,255,255,0.08)",
-            tickfont=dict(size=11, color="rgba(255,255,255,0.50)"),
-            title_font=dict(size=12, color="rgba(255,255,255,0.60)"),
-        ),
-        title_font=dict(size=14, color="rgba(255,255,255,0.80)"),
-    )
-    # Thicken lines and enlarge markers so they read well on dark glass
-    fig.update_traces(
-        selector=dict(type="scatter", mode="lines"),
-        line=dict(width=2.5),
-    )
-    fig.update_traces(
-        selector=dict(type="scatter"),
-        marker=dict(size=7),
-    )
-    fig.update_traces(
-        selector=dict(type="bar"),
-        marker_line_width=0,
-        opacity=0.92,
-    )
+# Rendered HTML keyed on sha256(spec + data): a repeat question that yields the
+# same spec over the same rows skips figure construction and serialisation.
+_CHART_CACHE_SIZE = 64
+_chart_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def _chart_key(spec: dict, data: dict) -> str:
+    payload = json.dumps([spec, data], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _render_plotly_sync(spec: dict, data: dict, div_id: Optional[str] = None) -> str:
+    # Styling comes from the bi_dark template — no per-figure layout pass
+    fig = _CHART_BUILDERS[spec["chart_type"]](pd.DataFrame(data), spec)
     return pio.to_html(
         fig,
         full_html=False,
         include_plotlyjs=False,
         config={"responsive": True, "displayModeBar": False},
+        div_id=div_id,
     )
 
 
 async def execute_chart_code(state: GraphState) -> dict:
-    script = state.get("chart_script", "")
-    if not script or script.startswith("Error"):
+    spec = state.get("chart_spec")
+    if not spec:
         return {"chart_html": None}
 
     data = state.get("data", {})
@@ -575,10 +783,19 @@ async def execute_chart_code(state: GraphState) -> dict:
         tables = data.get("tables", [])
         data = tables[0]["dataframe"] if tables and "dataframe" in tables[0] else {}
 
+    # Cached HTML is rendered with the key as its div id; every response gets
+    # a fresh id so two copies of one chart can share a page.
+    key = _chart_key(spec, data)
+    html = _cache_get(_chart_cache, key)
+    if html is not None:
+        logger.info("Chart served from cache (%d chars HTML)", len(html))
+        return {"chart_html": html.replace(key, uuid.uuid4().hex), "error_node": None}
+
     try:
-        html = await asyncio.to_thread(_render_plotly_sync, script, data)
+        html = await asyncio.to_thread(_render_plotly_sync, spec, data, key)
+        _cache_put(_chart_cache, key, html, _CHART_CACHE_SIZE)
         logger.info("Chart rendered (%d chars HTML)", len(html))
-        return {"chart_html": html, "error_node": None}
+        return {"chart_html": html.replace(key, uuid.uuid4().hex), "error_node": None}
     except Exception as exc:
         # Degrade gracefully: log the failure but do NOT set 'error' in state.
         # The SQL data is still valid — state_printer will return a table result.
@@ -625,6 +842,8 @@ def state_printer(state: GraphState) -> dict:
                     {col: vals[i] for col, vals in data.items()}
                     for i in range(n)
                 ]
+                if state.get("data_truncated"):
+                    outputs["truncated"] = True
         except Exception as exc:
             outputs["error"] = str(exc)
 
@@ -162,46 +162,34 @@ sql_generation_prompt = get_sql_generation_prompt()
 
 
 # ── Node: generate_chart_instructions ────────────────────────────────────────
-# No BI guardrails needed — this node only writes Plotly Python code.
+# No BI guardrails needed — this node only picks a chart spec.
+# The model returns JSON (response_format=json_object); nodes.py renders it
+# with a fixed set of Plotly builders, so no generated code is ever executed.
 CHART_SYSTEM_PROMPT = (
-    "You are a Plotly expert. Generate clean, correct Plotly Python code. "
-    "Return ONLY the Python code — no markdown, no backticks, no explanations."
+    "You are a data visualisation expert. Pick the best chart for a query result. "
+    "Respond with a single JSON object only."
 )
 
 CHART_GENERATION_TEMPLATE = """\
-Generate a Plotly Python script to visualise the query result below.
+Choose a chart to visualise the query result below.
 
 Question: "{question}"
 Column names: {columns}
 Sample rows (first 5): {sample}
 
-Available in scope (do NOT import or redefine):
-  df      — pandas DataFrame with the full result
-  px      — plotly.express
-  go      — plotly.graph_objects
-  pd, np  — pandas, numpy
-  COLORS  — list of 8 modern accent colours (use for explicit colouring)
-  THEME   — pre-built dark Plotly template name; pass as template=THEME
+Respond with JSON of exactly this shape:
+{{"chart_type": "...", "x": "...", "y": "...", "color": null, "title": "...", "sort_desc": false}}
 
 Rules:
-1. Choose the best chart type for the question:
-   - px.bar()        → compare quantities across categories
-   - px.line()       → trends over time or ordered sequences
-   - px.pie()        → proportional share (only when ≤ 8 slices)
-   - px.scatter()    → relationship between two numeric columns
-   - px.histogram()  → distribution of a single numeric column
-   - px.area()       → cumulative trends / stacked areas
-   - go.Figure()     → only for custom/combined charts
-2. Always pass template=THEME to px calls or fig.update_layout(template=THEME).
-3. Always pass color_discrete_sequence=COLORS for categorical colour.
-   For single-series charts use color_discrete_sequence=[COLORS[0]].
-4. Set a clear, concise title. Label axes when using go directly.
-5. For bar charts with many categories, sort by value descending.
-6. For pie charts, add hole=0.35 for a modern donut style.
-7. The LAST statement must assign the final figure to a variable named exactly `fig`.
-   Do NOT call fig.show() or fig.write_html().
-8. Do NOT wrap code in a function, class, or if-block.
-9. Do NOT use any import statements — all libraries are already in scope.
-
-Return ONLY the Python code.\
+1. chart_type is one of:
+   - "bar"        → compare quantities across categories
+   - "line"       → trends over time or ordered sequences
+   - "area"       → cumulative trends / stacked areas
+   - "pie"        → proportional share (only when ≤ 8 slices); x = labels, y = values
+   - "scatter"    → relationship between two numeric columns
+   - "histogram"  → distribution of a single numeric column (x only, y = null)
+2. x, y and color must be column names copied exactly from the list above.
+3. color is an optional column to split series by; use null for a single series.
+4. Set a clear, concise title.
+5. For bar charts with many categories, set sort_desc to true.\
 """
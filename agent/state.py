@@ -3,11 +3,14 @@ LangGraph state definition.
 
 Design rules:
   - Flat and JSON-serialisable — no live DB connections, no objects
-  - db_uri travels in state so each node opens its own short-lived connection
+  - db_uri travels in state; nodes check connections out of the shared
+    per-URI engine pool (core.database.get_engine)
   - chat_history uses Annotated[list, operator.add] so multiple nodes can append
     to it within a single graph run without overwriting each other
   - sql_retry_count / sql_error enable the retry loop in the graph
-  - error_node / error_category track WHERE and WHAT TYPE of error occurred
+  - error_node / error_category track WHERE and WHAT TYPE of error occurred;
+    they take a last-write-wins reducer because classify_question and
+    generate_sql run in the same superstep and may both report an error
   - hitl_approved / is_ddl drive the human-in-the-loop gate
 """
 from __future__ import annotations
@@ -18,6 +21,11 @@ from typing import Annotated, List, Optional
 from typing_extensions import TypedDict
 
 
+def _last_write(_old, new):
+    """Reducer: plain overwrite, but allowed from parallel branches."""
+    return new
+
+
 class ChatMessage(TypedDict):
     role: str      # "user" | "assistant"
     content: str
@@ -52,13 +60,14 @@ class GraphState(TypedDict):
     #   transient → retry with backoff (rate limit, DB lock, network)
     #   permanent → stop retrying, LLM needs to produce different SQL
     #   llm       → LLM API itself failed (not a SQL problem)
-    error_node: Optional[str]
-    error_category: Optional[str]
+    error_node: Annotated[Optional[str], _last_write]
+    error_category: Annotated[Optional[str], _last_write]
 
     # ── Processing ───────────────────────────────────────────────────────────
     sql_query: str
     data: dict
-    chart_script: str
+    data_truncated: bool         # single-table result was cut at sql_result_limit
+    chart_spec: Optional[dict]   # {"chart_type", "x", "y", "color", "title", "sort_desc"}
     chart_output: Optional[str]  # legacy PNG path (unused in Plotly path)
     chart_html: Optional[str]    # self-contained Plotly HTML string
 
@@ -31,7 +31,8 @@ The @asynccontextmanager lifespan function replaces the old @app.on_event().
 Code before `yield` runs once at startup.
 Code after `yield` runs once at shutdown.
 Use it to initialise/teardown shared resources (connection pools, ML models).
-We don't have shared resources to init, but the pattern is here for when you do.
+Shutdown disposes the pooled DB engines and closes the shared LLM HTTP
+client; both are recreated lazily on first use.
 """
 from __future__ import annotations
 
@@ -63,6 +64,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     yield
     # ---------- shutdown ----------
     logger.info("BI Agent API shutting down")
+    from agent.graph import aclose_http_client
+    from core.database import dispose_all_engines
+    dispose_all_engines()
+    await aclose_http_client()
 
 
 app = FastAPI(
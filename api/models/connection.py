@@ -11,6 +11,25 @@ from typing import List, Optional
 from pydantic import BaseModel, field_validator
 
 
+# (param name expected by DatabaseManager, model attribute) — module constant
+# so as_params() is a single pass with no per-call mapping dict.
+_PARAM_FIELDS = (
+    ("db_path", "db_path"),
+    ("host", "host"),
+    ("port", "port"),
+    ("user", "user"),
+    ("password", "password"),
+    ("database", "database"),
+    ("account", "account"),
+    ("warehouse", "warehouse"),
+    ("schema", "schema_"),
+    ("project", "project"),
+    ("dataset", "dataset"),
+    ("credentials_path", "credentials_path"),
+    ("sid", "sid"),
+)
+
+
 class ConnectRequest(BaseModel):
     db_type: str                    # "sqlite" | "mysql" | "postgres" | ...
 
@@ -44,22 +63,11 @@ class ConnectRequest(BaseModel):
 
     def as_params(self) -> dict:
         """Return connection parameters as a plain dict (strips None values)."""
-        mapping = {
-            "db_path": self.db_path,
-            "host": self.host,
-            "port": self.port,
-            "user": self.user,
-            "password": self.password,
-            "database": self.database,
-            "account": self.account,
-            "warehouse": self.warehouse,
-            "schema": self.schema_,
-            "project": self.project,
-            "dataset": self.dataset,
-            "credentials_path": self.credentials_path,
-            "sid": self.sid,
+        return {
+            param: value
+            for param, attr in _PARAM_FIELDS
+            if (value := getattr(self, attr)) is not None
         }
-        return {k: v for k, v in mapping.items() if v is not None}
 
 
 class ConnectResponse(BaseModel):
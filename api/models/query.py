@@ -24,6 +24,7 @@ class TableResult(BaseModel):
     dataframe: Optional[Dict[str, List[Any]]] = None   # {col: [values]}
     sql_statement: Optional[str] = None
     error: Optional[str] = None
+    truncated: bool = False   # rows beyond SQL_RESULT_LIMIT were dropped
 
 
 class QueryResponse(BaseModel):
@@ -37,6 +38,7 @@ class QueryResponse(BaseModel):
 
     # Exactly one of these is populated depending on result_type
     dataframe: Optional[List[Dict[str, Any]]] = None     # rows as list-of-dicts
+    truncated: bool = False   # dataframe holds only the first SQL_RESULT_LIMIT rows
     multi_table_data: Optional[List[TableResult]] = None
 
     # Self-contained Plotly HTML (full_html=True, include_plotlyjs="cdn")
@@ -10,14 +10,15 @@ from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import inspect, text
 
 from agent.graph import initialize_dag
+from agent.nodes import invalidate_table_info
 from api.dependencies import get_session
 from api.models.connection import ConnectRequest, ConnectResponse
 from api.session_store import Session, session_store
 from core.auth import get_current_user
-from core.database import DatabaseManager
+from core.database import DatabaseManager, dispose_engine, get_engine
 from core.storage import download_sqlite, key_to_local
 
 logger = logging.getLogger(__name__)
@@ -28,15 +29,19 @@ router = APIRouter()
 async def connect(req: ConnectRequest, _user: dict = Depends(get_current_user)) -> ConnectResponse:
     """
     1. Validate the DB credentials by opening a test connection.
-    2. Compile the LangGraph DAG (inspects the DB schema once).
+    2. Compile the LangGraph DAG (or reuse a cached one). The schema is
+       reflected later, off the event loop, by the first query.
     3. Store both in a new Session and return the session_id.
 
-    Why async?  initialize_dag calls SQLDatabase.from_uri which does I/O.
-    Wrapping it in asyncio.to_thread would be correct for a high-traffic API.
+    Why async?  The credential check and table listing still do blocking I/O.
+    Wrapping them in asyncio.to_thread would be correct for a high-traffic API.
     For a BI tool with 1–10 concurrent users, calling it directly from an
     async route is acceptable — it blocks the event loop only briefly.
     """
-    logger.debug("connect request: db_type=%r params=%r", req.db_type, req.as_params())
+    if logger.isEnabledFor(logging.DEBUG):
+        # Message args bypass the formatter's extra-field masking — redact here
+        params = {k: ("***" if k == "password" else v) for k, v in req.as_params().items()}
+        logger.debug("connect request: db_type=%r params=%r", req.db_type, params)
     db_manager = DatabaseManager()
     success, message = db_manager.connect(req.db_type, **req.as_params())
 
@@ -92,18 +97,18 @@ async def preview_data(
     Works for any session type — file uploads, SQLite, Postgres, etc.
     """
     try:
-        engine = create_engine(session.db_uri)
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            tables = inspector.get_table_names()
+        with get_engine(session.db_uri).connect() as conn:
+            # Live table list, not session.tables: approved DDL may have
+            # created or dropped tables since connect
+            tables = inspect(conn).get_table_names()
             if not tables:
                 return {"columns": [], "rows": [], "total": 0, "table": ""}
             tbl = table if table in tables else tables[0]
             result = conn.execute(text(f'SELECT * FROM "{tbl}" LIMIT :lim'), {"lim": limit})
             cols = list(result.keys())
             rows = [list(r) for r in result.fetchall()]
-            total = conn.execute(text(f'SELECT COUNT(*) FROM "{tbl}"')).scalar() or 0
-        engine.dispose()
+            # No binds — skip the text() compiler and go straight to the DBAPI
+            total = conn.exec_driver_sql(f'SELECT COUNT(*) FROM "{tbl}"').scalar() or 0
         return {"columns": cols, "rows": rows, "total": int(total), "table": tbl}
     except Exception as exc:
         logger.error("Preview failed for session %s: %s", session.session_id[:8], exc)
@@ -112,8 +117,11 @@ async def preview_data(
 
 @router.delete("/disconnect", status_code=status.HTTP_204_NO_CONTENT)
 async def disconnect(session: Session = Depends(get_session)) -> None:
-    """Remove the session from memory."""
+    """Remove the session from memory; release the DB pool if it was the last user."""
     session_store.delete(session.session_id)
+    if not session_store.uri_in_use(session.db_uri):
+        dispose_engine(session.db_uri)
+        invalidate_table_info(session.db_uri)
     logger.info("Session deleted: %s", session.session_id[:8])
 
 
@@ -171,18 +179,16 @@ async def reconnect_file(
                     detail=f"Could not restore file from storage. Please re-upload. ({exc})",
                 )
 
-    db_uri = f"sqlite:///{p}"
-    try:
-        engine = create_engine(db_uri)
-        with engine.connect() as conn:
-            inspector = inspect(engine)
-            tables = inspector.get_table_names()
-        engine.dispose()
-    except Exception as exc:
+    db_manager = DatabaseManager()
+    success, message = db_manager.connect("sqlite", db_path=str(p))
+    if not success:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Could not open SQLite file: {exc}",
+            detail=f"Could not open SQLite file: {message}",
         )
+    db_uri = db_manager.get_uri()
+    tables = db_manager.get_tables()
+    db_manager.close()
 
     try:
         dag, instructions = initialize_dag(db_uri, db_type="sqlite", tables=tables)
@@ -10,7 +10,7 @@ from fastapi.responses import Response
 
 from api.dependencies import get_session
 from api.session_store import Session
-from services.export_service import generate_session_pdf
+from services.export_service import session_pdf
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -32,7 +32,7 @@ async def export_pdf(session: Session = Depends(get_session)) -> Response:
         )
 
     try:
-        pdf_bytes = generate_session_pdf(session.chat_history)
+        pdf_bytes = session_pdf(session)
     except Exception as exc:
         logger.error("PDF export failed: %s", exc)
         raise HTTPException(
@@ -17,7 +17,7 @@ from __future__ import annotations
 
 import uuid
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -41,6 +41,9 @@ class Session:
     instructions: str = ""
     tables: List[str] = field(default_factory=list)
     chat_history: List[ChatEntry] = field(default_factory=list)
+    # Bumped on every history append — lets the PDF export skip re-hashing
+    history_version: int = 0
+    pdf_cache: Optional[Tuple[tuple, bytes]] = None   # ((history_version, stamp), PDF bytes)
     # HITL: set when the graph is suspended at a confirm_sql interrupt()
     pending_thread_id: Optional[str] = None
     pending_interrupt: Optional[dict] = None   # the value passed to interrupt()
@@ -79,10 +82,15 @@ class SessionStore:
     def delete(self, session_id: str) -> None:
         self._sessions.pop(session_id, None)
 
+    def uri_in_use(self, db_uri: str) -> bool:
+        """True while any session still points at *db_uri* (engines are shared per URI)."""
+        return any(s.db_uri == db_uri for s in self._sessions.values())
+
     def append_history(self, session_id: str, entry: ChatEntry) -> None:
         session = self._sessions.get(session_id)
         if session:
             session.chat_history.append(entry)
+            session.history_version += 1
 
     def set_pending(self, session_id: str, thread_id: str, interrupt_data: dict) -> None:
         session = self._sessions.get(session_id)
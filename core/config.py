@@ -28,6 +28,10 @@ class Settings(BaseSettings):
     # SQL
     sql_result_limit: int = 500          # max rows returned per query
 
+    # Repeat questions skip the classify / SQL LLM calls (per-process LRU).
+    # 0 disables the cache.
+    question_cache_size: int = 256
+
     # CORS — comma-separated list of allowed origins.
     # Set ALLOWED_ORIGINS env var in production, e.g.:
     #   ALLOWED_ORIGINS=https://your-app.vercel.app,https://your-custom-domain.com
@@ -5,10 +5,123 @@ No FastAPI, no Streamlit imports here.
 from __future__ import annotations
 
 import os
-from typing import Optional, Tuple, Any
+import threading
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 import sqlalchemy
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.dialects import registry
+from sqlalchemy.pool import StaticPool
+
+# Third-party dialects otherwise resolve through an entry-point scan of every
+# installed distribution on first create_engine(). Registering the module path
+# up front is lazy — the driver is imported only when that db_type connects.
+_PLUGIN_DIALECTS = {
+    "snowflake": ("snowflake.sqlalchemy", "dialect"),
+    "bigquery":  ("sqlalchemy_bigquery", "BigQueryDialect"),
+    "duckdb":    ("duckdb_engine", "Dialect"),
+}
+for _name, (_module, _obj) in _PLUGIN_DIALECTS.items():
+    registry.register(_name, _module, _obj)
+
+
+# db_type → (URI template, defaults for optional params).
+# Every other {field} in the template is required.
+_URI_TEMPLATES: Dict[str, Tuple[str, dict]] = {
+    "sqlite":    ("sqlite:///{db_path}", {}),
+    "duckdb":    ("duckdb:///{db_path}", {}),
+    "mysql":     ("mysql+pymysql://{user}:{password}@{host}:{port}/{database}",
+                  {"host": "localhost", "port": 3306, "password": ""}),
+    "postgres":  ("postgresql+psycopg2://{user}:{password}@{host}:{port}/{database}",
+                  {"host": "localhost", "port": 5432, "password": ""}),
+    "mssql":     ("mssql+pyodbc://{user}:{password}@{host}:{port}/{database}"
+                  "?driver=ODBC+Driver+17+for+SQL+Server",
+                  {"host": "localhost", "port": 1433, "password": ""}),
+    "oracle":    ("oracle+cx_oracle://{user}:{password}@{host}:{port}/{sid}",
+                  {"host": "localhost", "port": 1521, "sid": "", "password": ""}),
+    "snowflake": ("snowflake://{user}:{password}@{account}/{database}/{schema}"
+                  "?warehouse={warehouse}",
+                  {"schema": "PUBLIC", "password": ""}),
+    "bigquery":  ("bigquery://{project}/{dataset}", {}),
+}
+_URI_ALIASES = {"postgresql": "postgres"}
+
+# Field names per template, parsed once at import
+_TEMPLATE_FIELDS: Dict[str, List[str]] = {
+    name: [f for _, f, _, _ in Formatter().parse(template) if f]
+    for name, (template, _) in _URI_TEMPLATES.items()
+}
+
+# Credentials may contain URI delimiters (@ : / ?) — quote before substitution.
+# quote(), not quote_plus(): SQLAlchemy decodes with unquote(), so "+" stays "+".
+_QUOTED_PARAMS = frozenset({"user", "password"})
+
+
+def pool_kwargs_for_uri(uri: str) -> dict:
+    """
+    create_engine() pool settings for *uri*.
+
+    File DBs have no network, so no pre-ping or recycling. SQLite files keep
+    SQLAlchemy's default QueuePool: engines are shared across worker threads
+    (see get_engine) and a single StaticPool connection is not thread-safe.
+    In-memory SQLite needs StaticPool — the one connection IS the database.
+    DuckDB's dialect picks its own pool class.
+    """
+    dialect = uri.split(":", 1)[0].split("+", 1)[0]
+    if dialect == "sqlite":
+        if uri.endswith(":memory:") or uri.rstrip("/") == "sqlite:":
+            return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        return {}
+    if dialect == "duckdb":
+        return {}
+    # Network DBs: keep warm connections, replace dead sockets on checkout
+    return {
+        "pool_size": 10,
+        "max_overflow": 5,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Process-wide engine registry
+# ---------------------------------------------------------------------------
+# One pooled engine per URI for the life of the process, so agent queries and
+# previews reuse warm connections instead of paying a handshake per call.
+# Disposed at API shutdown (see api/main.py lifespan).
+
+_engines: Dict[str, sqlalchemy.engine.Engine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(uri: str) -> sqlalchemy.engine.Engine:
+    """Shared pooled engine for *uri*, created on first use. Thread-safe."""
+    engine = _engines.get(uri)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(uri)
+            if engine is None:
+                engine = _engines[uri] = create_engine(uri, **pool_kwargs_for_uri(uri))
+    return engine
+
+
+def dispose_engine(uri: str) -> None:
+    """Drop *uri*'s pooled engine and close its idle connections."""
+    with _engines_lock:
+        engine = _engines.pop(uri, None)
+    if engine is not None:
+        engine.dispose()
+
+
+def dispose_all_engines() -> None:
+    """Close every pooled connection — call once at shutdown."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
 
 
 class DatabaseManager:
@@ -19,10 +132,8 @@ class DatabaseManager:
 
     def __init__(self) -> None:
         self.engine: Optional[sqlalchemy.engine.Engine] = None
-        self.conn: Optional[sqlalchemy.engine.Connection] = None
         self.db_type: Optional[str] = None
         self.db_uri: Optional[str] = None
-        self._inspector: Optional[sqlalchemy.engine.Inspector] = None
 
     # ------------------------------------------------------------------
     # Public API
@@ -30,95 +141,70 @@ class DatabaseManager:
 
     def connect(self, db_type: str, **params) -> Tuple[bool, str]:
         """
-        Build URI, create engine, test connection.
+        Build URI, create a pooled engine, test connection.
         Returns (success, human-readable message).
+
+        No connection is held open afterwards — callers check one out of
+        the pool per query via `with self.engine.connect() as conn:`.
         """
         self.close()
 
-        uri = self._build_uri(db_type.lower(), **params)
+        try:
+            uri = self._build_uri(db_type.lower(), **params)
+        except ValueError as exc:
+            return False, str(exc)
         if not uri:
-            dt = db_type.lower()
-            if dt in ("sqlite", "duckdb"):
-                return False, f"db_path is required for {db_type}"
             return False, f"Unsupported database type: {db_type}"
 
         try:
-            self.engine = create_engine(uri)
-            self.conn = self.engine.connect()
-            self.conn.execute(text("SELECT 1"))
+            self.engine = create_engine(uri, **pool_kwargs_for_uri(uri))
+            # Opening a connection is enough to surface auth/network errors —
+            # no extra SELECT 1 round trip. It goes straight back to the pool.
+            with self.engine.connect():
+                pass
             self.db_type = db_type.lower()
             self.db_uri = uri
-            self._inspector = inspect(self.engine)
             return True, f"Connected to {db_type}"
         except Exception as exc:
             self.close()
             return False, f"Connection failed: {exc}"
 
     def close(self) -> None:
-        if self.conn:
-            self.conn.close()
-            self.conn = None
         if self.engine:
             self.engine.dispose()
             self.engine = None
 
     def get_tables(self) -> list:
-        return self._inspector.get_table_names() if self._inspector else []
+        return inspect(self.engine).get_table_names() if self.engine else []
 
     def get_uri(self) -> Optional[str]:
         return self.db_uri
 
     # ------------------------------------------------------------------
-    # URI builder — one branch per DB type
+    # URI builder — table-driven, see _URI_TEMPLATES
     # ------------------------------------------------------------------
 
     def _build_uri(self, db_type: str, **p) -> Optional[str]:
-        if db_type == "sqlite":
-            path = p.get("db_path")
-            if not path:
-                return None   # force a 400: caller must supply db_path
-            return f"sqlite:///{path}"
-
-        if db_type == "mysql":
-            return (
-                f"mysql+pymysql://{p['user']}:{p['password']}"
-                f"@{p.get('host') or 'localhost'}:{p.get('port') or 3306}/{p['database']}"
-            )
-
-        if db_type in ("postgres", "postgresql"):
-            return (
-                f"postgresql://{p['user']}:{p['password']}"
-                f"@{p.get('host') or 'localhost'}:{p.get('port') or 5432}/{p['database']}"
-            )
-
-        if db_type == "mssql":
-            return (
-                f"mssql+pyodbc://{p['user']}:{p['password']}"
-                f"@{p.get('host') or 'localhost'}:{p.get('port') or 1433}/{p['database']}"
-                "?driver=ODBC+Driver+17+for+SQL+Server"
-            )
-
-        if db_type == "oracle":
-            return (
-                f"oracle+cx_oracle://{p['user']}:{p['password']}"
-                f"@{p.get('host') or 'localhost'}:{p.get('port') or 1521}/{p.get('sid','')}"
-            )
-
-        if db_type == "snowflake":
-            return (
-                f"snowflake://{p['user']}:{p['password']}@{p['account']}"
-                f"/{p['database']}/{p.get('schema','PUBLIC')}?warehouse={p['warehouse']}"
-            )
-
-        if db_type == "bigquery":
-            if creds := p.get("credentials_path"):
-                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds
-            return f"bigquery://{p['project']}/{p['dataset']}"
-
-        if db_type == "duckdb":
-            path = p.get("db_path")
-            if not path:
-                return None
-            return f"duckdb:///{path}"
-
-        return None
+        """
+        Fill the template for *db_type*. Returns None for unknown types and
+        raises ValueError naming any required parameter that is missing.
+        """
+        db_type = _URI_ALIASES.get(db_type, db_type)
+        spec = _URI_TEMPLATES.get(db_type)
+        if spec is None:
+            return None
+        template, defaults = spec
+
+        # Empty strings count as "not supplied" so defaults still apply
+        values = {**defaults, **{k: v for k, v in p.items() if v not in (None, "")}}
+        for k in _QUOTED_PARAMS & values.keys():
+            values[k] = quote(str(values[k]), safe="")
+
+        missing = [f for f in _TEMPLATE_FIELDS[db_type] if f not in values]
+        if missing:
+            verb = "is" if len(missing) == 1 else "are"
+            raise ValueError(f"{', '.join(missing)} {verb} required for {db_type}")
+
+        if db_type == "bigquery" and (creds := p.get("credentials_path")):
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds
+        return template.format(**values)
@@ -35,6 +35,8 @@ from typing import List, Tuple
 import pandas as pd
 import sqlalchemy
 
+from core.database import pool_kwargs_for_uri
+
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
@@ -436,7 +438,8 @@ def file_to_sqlite(
     tmp_dir.mkdir(parents=True, exist_ok=True)
 
     db_path = str(tmp_dir / f'{uuid.uuid4().hex}.db')
-    engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
+    db_uri = f'sqlite:///{db_path}'
+    engine = sqlalchemy.create_engine(db_uri, **pool_kwargs_for_uri(db_uri))
     try:
         df.to_sql(table_name, engine, index=False, if_exists='replace')
     finally:
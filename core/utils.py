@@ -5,7 +5,15 @@ Safe to import from any layer.
 from __future__ import annotations
 
 import re
-from typing import List
+from typing import List, Optional
+
+_FENCE = "```"
+_SQL_KEYWORDS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+_FROM_TABLE_RE = re.compile(r"FROM\s+(\w+)", re.IGNORECASE)
+# Every line boundary str.splitlines() recognises, folded to "\n" first
+_LINE_BREAK_RE = re.compile(r"\r\n?|[\x0b\x0c\x1c-\x1e\x85\u2028\u2029]")
+# A whole "--" comment line (leading spaces/tabs allowed) and its newline
+_COMMENT_LINE_RE = re.compile(r"^[^\S\n]*--[^\n]*\n?", re.MULTILINE)
 
 
 # ---------------------------------------------------------------------------
@@ -21,60 +29,67 @@ def extract_sql_code(response: object) -> str:
     text = text.replace("SQLQuery:", "").strip()
 
     # 1. ```sql ... ``` block
-    m = re.search(r"```sql\s*([\s\S]+?)\s*```", text, re.IGNORECASE)
-    if m:
-        return m.group(1).strip()
+    block = _fenced_block(text, "sql")
+    if block is not None:
+        return block
 
     # 2. Any ``` block whose first token is a SQL keyword
-    m = re.search(r"```\s*([\s\S]+?)\s*```", text)
-    if m:
-        candidate = m.group(1).strip()
-        if _starts_with_sql_keyword(candidate):
-            return candidate
+    block = _fenced_block(text)
+    if block is not None and _starts_with_sql_keyword(block):
+        return block
 
     # 3. Inline backtick token
     for part in text.split("`"):
-        if _starts_with_sql_keyword(part.strip()):
-            return part.strip()
+        part = part.strip()
+        if _starts_with_sql_keyword(part):
+            return part
 
     # 4. Line-by-line scan
     for line in text.splitlines():
-        if _starts_with_sql_keyword(line.strip()):
-            return line.strip()
+        line = line.strip()
+        if _starts_with_sql_keyword(line):
+            return line
 
     return text.strip()
 
 
-def _starts_with_sql_keyword(s: str) -> bool:
-    SQL_KEYWORDS = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
-    return any(s.upper().startswith(kw) for kw in SQL_KEYWORDS)
+def _find_fence(text: str, pos: int) -> int:
+    """Index of the next ``` at or after *pos*, or -1."""
+    # Single-char find is a memchr; a 3-char "```" needle is ~50x slower.
+    i = text.find("`", pos)
+    while i != -1 and not text.startswith(_FENCE, i):
+        i = text.find("`", i + 1)
+    return i
 
 
-# ---------------------------------------------------------------------------
-# Python code extraction (for chart scripts)
-# ---------------------------------------------------------------------------
-
-def extract_python_code(response: object) -> str:
+def _fenced_block(text: str, lang: str = "") -> Optional[str]:
+    r"""
+    Body of the first ``` fence tagged *lang* (any fence if empty), stripped,
+    or None. Same match as the regex  ```lang\s*([\s\S]+?)\s*```  but fences
+    are literal, so plain scanning replaces a backtracking search over the
+    whole LLM response.
     """
-    Extract Python code from an LLM response.
-    Looks for ```python ... ``` or ``` blocks first, then returns the raw text.
-    Never filters individual lines — continuation lines of multi-line calls must be preserved.
-    """
-    text: str = response.content if hasattr(response, "content") else str(response)
-    text = text.replace("Python Script:", "").strip()
+    start = _find_fence(text, 0)
+    while start != -1:
+        tag_end = start + len(_FENCE) + len(lang)
+        tag = text[start + len(_FENCE):tag_end]
+        if tag.lower() == lang:
+            body = tag_end
+            while body < len(text) and text[body].isspace():
+                body += 1
+            end = _find_fence(text, body + 1)   # body is at least one char
+            if end != -1:
+                return text[body:end].strip()
+            # Whitespace-only body directly followed by a fence
+            return "" if body > tag_end and text.startswith(_FENCE, body) else None
+        start = _find_fence(text, start + 1)
+    return None
 
-    # Try ```python ... ``` fence first
-    m = re.search(r"```python\s*([\s\S]+?)\s*```", text, re.DOTALL)
-    if m:
-        return m.group(1).strip()
-
-    # Try plain ``` ... ``` fence
-    m = re.search(r"```\s*([\s\S]+?)\s*```", text, re.DOTALL)
-    if m:
-        return m.group(1).strip()
 
-    # No fence — return the raw text wholesale so multi-line calls stay intact
-    return text.strip()
+def _starts_with_sql_keyword(s: str) -> bool:
+    # Upper-case only the prefix, once — the candidate may be the whole
+    # multi-KB response. str.startswith(tuple) checks every keyword in C.
+    return s[:6].upper().startswith(_SQL_KEYWORDS)
 
 
 # ---------------------------------------------------------------------------
@@ -85,17 +100,46 @@ def split_sql_statements(sql_text: str) -> List[str]:
     """Split a block of SQL into individual statements (split on ';')."""
     if not sql_text:
         return []
-    lines = [l for l in sql_text.splitlines() if not l.strip().startswith("--")]
-    return [s.strip() for s in "\n".join(lines).split(";") if s.strip()]
+    text = _strip_comment_lines(sql_text)
+    return [stmt for stmt in map(str.strip, text.split(";")) if stmt]
+
+
+def _strip_comment_lines(sql: str) -> str:
+    """
+    *sql* with line breaks normalised to "\n" and whole-line "--" comments
+    removed — what the old splitlines → filter → join round-trip produced,
+    in regex passes instead of a list of lines. The comment pass is skipped
+    when there is no "--" at all.
+    """
+    sql = _LINE_BREAK_RE.sub("\n", sql)
+    return _COMMENT_LINE_RE.sub("", sql) if "--" in sql else sql
 
 
 def is_multi_statement_sql(sql_query: str) -> bool:
-    return len(split_sql_statements(sql_query)) > 1
+    # Common case first: no ';' at all, or only a trailing one — no split needed
+    n = sql_query.count(";")
+    if n == 0 or (n == 1 and sql_query.rstrip().endswith(";")):
+        return False
+    # Walk ';' boundaries and stop at the second non-empty statement instead
+    # of materialising every statement of a large batch.
+    text = _strip_comment_lines(sql_query)
+    seen = False
+    start = 0
+    while start <= len(text):
+        end = text.find(";", start)
+        if end == -1:
+            end = len(text)
+        if text[start:end].strip():
+            if seen:
+                return True
+            seen = True
+        start = end + 1
+    return False
 
 
 def extract_table_name_from_sql(statement: str) -> str:
     """Best-effort table name extraction from a single SQL statement."""
-    m = re.search(r"FROM\s+(\w+)", statement, re.IGNORECASE)
+    m = _FROM_TABLE_RE.search(statement)
     if m:
         return m.group(1)
     return "Unknown Table"
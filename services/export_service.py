@@ -3,24 +3,36 @@ Export service — generates a PDF from session chat history.
 
 Zero Streamlit imports here. This is pure business logic.
 The PDF is returned as bytes; the caller (router) wraps it in a Response.
+
+Rendered PDFs are memoised on a content hash of the chat history plus the
+minute-precision "Generated:" stamp, so re-exporting an unchanged session
+within the same minute skips FPDF layout and serialisation, and a cached
+PDF never carries an outdated stamp.
 """
 from __future__ import annotations
 
-import base64
-import io
+import hashlib
+import json
 import logging
-import tempfile
+from collections import OrderedDict
+from dataclasses import asdict
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 
 from fpdf import FPDF
 
-from api.session_store import ChatEntry
+from api.session_store import ChatEntry, Session
 
 logger = logging.getLogger(__name__)
 
 _MAX_ROWS_IN_PDF = 50       # truncate large DataFrames to keep PDFs manageable
 _MAX_CELL_CHARS = 25        # truncate long cell values
+_MAX_COLS_IN_PDF = 18       # beyond this, A4 cells are too narrow to read
+_PDF_CACHE_SIZE = 16        # rendered PDFs kept in memory (LRU)
+
+_STAMP_FORMAT = "%Y-%m-%d %H:%M"   # cache granularity — see module docstring
+
+_pdf_cache: "OrderedDict[tuple, bytes]" = OrderedDict()
 
 
 class _BIPdf(FPDF):
@@ -55,56 +67,121 @@ class _BIPdf(FPDF):
             self.body_text("(empty result)")
             return
 
-        cols = list(rows[0].keys())
+        cols = list(rows[0].keys())[:_MAX_COLS_IN_PDF]
+        # Stringify + truncate every shown cell up front so the draw loop
+        # does nothing but FPDF calls.
+        body = [
+            [str(row.get(col, ""))[:_MAX_CELL_CHARS] for col in cols]
+            for row in rows[:_MAX_ROWS_IN_PDF]
+        ]
+        self._draw_table(cols, body, len(rows), len(rows[0]))
+
+    def add_column_data(self, data: Dict[str, list]) -> None:
+        """Same as add_dataframe for {col: [values]} — slices columns, never builds row dicts."""
+        n_rows = len(next(iter(data.values()), []))
+        if not n_rows:
+            self.body_text("(empty result)")
+            return
+
+        cols = list(data.keys())[:_MAX_COLS_IN_PDF]
+        columns = [
+            [str(v)[:_MAX_CELL_CHARS] for v in data[col][:_MAX_ROWS_IN_PDF]]
+            for col in cols
+        ]
+        self._draw_table(cols, [list(r) for r in zip(*columns)], n_rows, len(data))
+
+    def _draw_table(self, cols: list, body: List[List[str]], n_rows: int, n_cols: int) -> None:
+        header = [str(col)[:_MAX_CELL_CHARS] for col in cols]
         col_w = min(180 / len(cols), 50)
+        cell = self.cell
+
+        self._table_header(header, col_w)
+        for values in body:
+            if self.will_page_break(6):
+                # Break ourselves so the header row repeats on the new page
+                self.add_page()
+                self._table_header(header, col_w)
+            for text in values[:-1]:
+                cell(col_w, 6, text, border=1)
+            cell(col_w, 6, values[-1], border=1, new_x="LMARGIN", new_y="NEXT")
+
+        hidden = []
+        if n_rows > _MAX_ROWS_IN_PDF:
+            hidden.append(f"{n_rows - _MAX_ROWS_IN_PDF} more rows")
+        if n_cols > _MAX_COLS_IN_PDF:
+            hidden.append(f"{n_cols - _MAX_COLS_IN_PDF} more columns")
+        if hidden:
+            self.set_font("Helvetica", "I", 8)
+            self.cell(0, 6, f"... and {' and '.join(hidden)}", new_x="LMARGIN", new_y="NEXT")
 
+        self.ln(4)
+
+    def _table_header(self, header: List[str], col_w: float) -> None:
+        """Draw the header row, leaving the body font selected."""
         self.set_font("Helvetica", "B", 8)
         self.set_fill_color(200, 220, 255)
-        for col in cols:
-            self.cell(col_w, 6, str(col)[:_MAX_CELL_CHARS], border=1, fill=True)
-        self.ln()
-
+        for text in header[:-1]:
+            self.cell(col_w, 6, text, border=1, fill=True)
+        self.cell(col_w, 6, header[-1], border=1, fill=True, new_x="LMARGIN", new_y="NEXT")
         self.set_font("Helvetica", "", 8)
-        display_rows = rows[:_MAX_ROWS_IN_PDF]
-        for row in display_rows:
-            for col in cols:
-                self.cell(col_w, 6, str(row.get(col, ""))[:_MAX_CELL_CHARS], border=1)
-            self.ln()
 
-        if len(rows) > _MAX_ROWS_IN_PDF:
-            self.set_font("Helvetica", "I", 8)
-            self.cell(0, 6, f"... and {len(rows) - _MAX_ROWS_IN_PDF} more rows", new_x="LMARGIN", new_y="NEXT")
 
-        self.ln(4)
+def _history_key(chat_history: List[ChatEntry]) -> str:
+    """Content hash of the chat history — equal histories render equal PDFs."""
+    h = hashlib.sha256()
+    for entry in chat_history:
+        h.update(json.dumps(asdict(entry), sort_keys=True, default=str).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
 
-    def add_chart(self, chart_base64: str) -> None:
-        try:
-            img_bytes = base64.b64decode(chart_base64)
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-                tmp.write(img_bytes)
-                tmp_path = tmp.name
-            self.image(tmp_path, x=15, w=180)
-            import os
-            os.remove(tmp_path)
-        except Exception as exc:
-            logger.warning("Could not add chart to PDF: %s", exc)
-            self.body_text(f"[Chart unavailable: {exc}]")
-        self.ln(4)
+
+def session_pdf(session: Session) -> bytes:
+    """
+    PDF for *session*. Cheapest check first: if no entry has been appended
+    since the last export in this minute, return those bytes without hashing
+    anything.
+    """
+    stamp = datetime.now().strftime(_STAMP_FORMAT)
+    version = (session.history_version, stamp)
+    if session.pdf_cache and session.pdf_cache[0] == version:
+        return session.pdf_cache[1]
+    pdf_bytes = generate_session_pdf(session.chat_history, stamp)
+    session.pdf_cache = (version, pdf_bytes)
+    return pdf_bytes
 
 
-def generate_session_pdf(chat_history: List[ChatEntry]) -> bytes:
+def generate_session_pdf(chat_history: List[ChatEntry], stamp: str | None = None) -> bytes:
     """
     Convert the session's chat history into a PDF and return raw bytes.
+    *stamp* is the "Generated:" time (now, to the minute, by default).
+    Served from an in-process LRU cache when history and stamp are unchanged.
     """
-    pdf = _BIPdf()
+    stamp = stamp or datetime.now().strftime(_STAMP_FORMAT)
+    key = (_history_key(chat_history), stamp)
+    cached = _pdf_cache.get(key)
+    if cached is not None:
+        _pdf_cache.move_to_end(key)
+        logger.debug("PDF cache hit (%d entries)", len(chat_history))
+        return cached
+
+    pdf_bytes = _build_pdf(chat_history, stamp)
+    _pdf_cache[key] = pdf_bytes
+    if len(_pdf_cache) > _PDF_CACHE_SIZE:
+        _pdf_cache.popitem(last=False)
+    return pdf_bytes
+
+
+def _build_pdf(chat_history: List[ChatEntry], stamp: str) -> bytes:
+    # Fresh document per export — no FPDF state carried between calls.
+    pdf = _BIPdf(orientation="P", unit="mm", format="A4")
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
 
     # Cover block
     pdf.set_font("Helvetica", "B", 14)
-    pdf.cell(0, 10, "BI Agent — Session Export", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 10, "BI Agent - Session Export", align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.set_font("Helvetica", "", 9)
-    pdf.cell(0, 6, f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", align="C", new_x="LMARGIN", new_y="NEXT")
+    pdf.cell(0, 6, f"Generated: {stamp}", align="C", new_x="LMARGIN", new_y="NEXT")
     pdf.ln(8)
 
     for idx, entry in enumerate(chat_history, start=1):
@@ -126,18 +203,16 @@ def generate_session_pdf(chat_history: List[ChatEntry]) -> bytes:
                 if table.get("error"):
                     pdf.body_text(f"Error: {table['error']}")
                 elif table.get("dataframe"):
-                    rows = [
-                        {col: vals[i] for col, vals in table["dataframe"].items()}
-                        for i in range(len(next(iter(table["dataframe"].values()))))
-                    ]
-                    pdf.add_dataframe(rows)
+                    pdf.add_column_data(table["dataframe"])
 
         elif entry.dataframe:
             pdf.add_dataframe(entry.dataframe)
 
-        if entry.chart_base64:
-            pdf.add_chart(entry.chart_base64)
+        if entry.chart_html:
+            # Charts are interactive Plotly HTML — there is no PNG to embed.
+            pdf.body_text("[Interactive chart - open the session in the app to view it]")
 
         pdf.ln(4)
 
+    # fpdf2 serialises straight to a bytearray — no str → latin-1 re-encode.
     return bytes(pdf.output())
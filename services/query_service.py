@@ -67,7 +67,7 @@ def _blank_inputs(question: str, session: "Session") -> dict:
         "sql_retry_count": 0, "sql_error": None,
         "is_ddl": False, "hitl_approved": None,
         "error_node": None, "error_category": None,
-        "sql_query": "", "data": {}, "chart_script": "",
+        "sql_query": "", "data": {}, "data_truncated": False, "chart_spec": None,
         "chart_output": None, "chart_html": None, "final_output": None,
         "error": None, "direct_response": None,
     }
@@ -116,6 +116,7 @@ def _extract_result(steps: dict, session: "Session", question: str) -> QueryResp
                 dataframe=t.get("dataframe"),
                 sql_statement=t.get("sql_statement"),
                 error=t.get("error"),
+                truncated=t.get("truncated", False),
             )
             for t in final_output["multi_table_data"]
         ]
@@ -148,6 +149,7 @@ def _extract_result(steps: dict, session: "Session", question: str) -> QueryResp
         sql_query=sql_query,
         result_type=result_type,
         dataframe=dataframe_rows,
+        truncated=final_output.get("truncated", False),
         multi_table_data=multi_table,
         chart_html=chart_html,
         error=final_output.get("error"),